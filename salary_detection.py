@@ -1,6 +1,180 @@
+import tempfile
 from typing import Tuple
+import numba
+import numpy as np
 import pandas as pd
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_values
+
+
+@numba.njit(cache=True, nogil=True, parallel=True)
+def _scan_streaks(
+    days: np.ndarray,
+    in_range: np.ndarray,
+    bounds: np.ndarray,
+    chunks: np.ndarray,
+    lo: int,
+    hi: int,
+    min_occurrences: int,
+) -> np.ndarray:
+    """
+    Return a boolean mask of the rows that belong to a streak of at least
+    `min_occurrences` consecutive transactions.
+
+    Row i extends the streak of row i-1 when its `days` interval is within
+    [lo, hi] and the amounts of both rows are in range; any other row starts
+    a new streak. Missing intervals must be passed as a negative sentinel.
+
+    Streaks never cross a partition boundary, so the rows are scanned in
+    parallel, one chunk of whole partitions (see `_partition_chunks`) per task;
+    each task writes only its own slice of the mask.
+    """
+    keep = np.zeros(days.shape[0], dtype=np.bool_)
+
+    for c in numba.prange(chunks.shape[0] - 1):
+        start = bounds[chunks[c]]
+        end = bounds[chunks[c + 1]]
+        n = end - start
+
+        # Link pass: link[i] is 1 when row i extends the streak of row i-1.
+        # Non-short-circuit `&` keeps this loop branch-free, so it vectorizes.
+        link = np.empty(n, dtype=np.uint8)
+        link[0] = 0
+        for i in range(1, n):
+            d = days[start + i]
+            link[i] = (
+                (d >= lo) & (d <= hi) & in_range[start + i] & in_range[start + i - 1]
+            )
+
+        # Break pass: a plain scan over the precomputed links, closing a streak at each 0
+        streak_start = 0
+        for i in range(1, n):
+            if link[i] == 0:
+                if i - streak_start >= min_occurrences:
+                    keep[start + streak_start : start + i] = True
+                streak_start = i
+        if n - streak_start >= min_occurrences:
+            keep[start + streak_start : end] = True
+
+    return keep
+
+
+_PARTITION_COLUMNS = ["customer_id", "merchant_name"]
+
+# Columns of a detected salary transaction, in customer_salary insert order
+_SALARY_COLUMNS = [
+    "customer_id",
+    "ob_transaction_id",
+    "merchant_name",
+    "amount",
+    "ob_transaction_description",
+    "ob_transaction_timestamp",
+]
+
+
+# Partitions up to this size get their median from an insertion sort
+_SMALL_PARTITION = 32
+
+
+def _partition_chunks(bounds: np.ndarray) -> np.ndarray:
+    """
+    Group the partitions `bounds[k]:bounds[k + 1]` into a few chunks per thread
+    of roughly equal row counts. Returns the chunk edges as indices into `bounds`.
+    """
+    n_chunks = 4 * numba.get_num_threads()
+    targets = np.linspace(0, bounds[-1], n_chunks + 1)
+    return np.unique(np.searchsorted(bounds, targets))
+
+
+@numba.njit(cache=True, nogil=True, parallel=True)
+def _partition_medians(
+    amount: np.ndarray, bounds: np.ndarray, chunks: np.ndarray
+) -> np.ndarray:
+    """
+    Return the median amount of each partition `bounds[k]:bounds[k + 1]`,
+    broadcast back to the partition's rows.
+
+    Most partitions hold a handful of transactions, so they're sorted into a
+    small scratch buffer with an insertion sort, which beats a general selection
+    at that size. Larger partitions fall back to np.median (a quickselect).
+    Chunks of partitions are processed in parallel, each with its own buffer.
+    """
+    median_amount = np.empty(amount.shape[0], dtype=np.float64)
+    for c in numba.prange(chunks.shape[0] - 1):
+        scratch = np.empty(_SMALL_PARTITION, dtype=np.float64)
+        for k in range(chunks[c], chunks[c + 1]):
+            start, end = bounds[k], bounds[k + 1]
+            n = end - start
+            if n > _SMALL_PARTITION:
+                median_amount[start:end] = np.median(amount[start:end])
+                continue
+
+            for i in range(n):
+                value = amount[start + i]
+                j = i
+                while j > 0 and scratch[j - 1] > value:
+                    scratch[j] = scratch[j - 1]
+                    j -= 1
+                scratch[j] = value
+
+            half = n // 2
+            if n % 2:
+                median_amount[start:end] = scratch[half]
+            else:
+                median_amount[start:end] = 0.5 * (scratch[half - 1] + scratch[half])
+    return median_amount
+
+
+def _partition_features(
+    df: pd.DataFrame,
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sort `df` by (customer_id, merchant_name, timestamp) and compute, for the
+    whole frame at once, each row's day interval since the previous transaction
+    of its partition and its partition's median amount.
+
+    Partitions are contiguous after the sort, so they're located by comparing
+    each row's keys with the previous row's and handled as array slices; no
+    groupby hash table or per-group frames are built. Intervals are whole days
+    (floored like `Timedelta.days`) stored as int32, with -1 where there is no
+    previous transaction in the partition. `days_since_last` / `median_amount`
+    columns computed server-side by `get_credit_transactions` are used as-is.
+
+    Returns the sorted frame, the `days` and `median_amount` arrays aligned with
+    it, and the partition `bounds` (start rows, followed by the row count).
+    """
+    df = df.sort_values(
+        _PARTITION_COLUMNS + ["ob_transaction_timestamp"], kind="stable"
+    )
+
+    # A row starts a new partition when any key differs from the previous row.
+    # NaN keys are grouped together, like groupby(dropna=False).
+    n = len(df)
+    new_partition = np.zeros(n, dtype=bool)
+    for col in _PARTITION_COLUMNS:
+        key = df[col]
+        prev_key = key.shift()
+        # Arrow-backed keys yield NA when exactly one side is missing: a change
+        new_partition |= (
+            (key != prev_key) & ~(key.isna() & prev_key.isna())
+        ).to_numpy(dtype=bool, na_value=True)
+    new_partition[0] = True
+    bounds = np.append(np.flatnonzero(new_partition), n)
+
+    if {"days_since_last", "median_amount"}.issubset(df.columns):
+        days = df["days_since_last"].fillna(-1).to_numpy(np.int32, copy=True)
+        days[bounds[:-1]] = -1
+        median_amount = df["median_amount"].to_numpy(np.float64)
+        return df, days, median_amount, bounds
+
+    ts = df["ob_transaction_timestamp"].to_numpy("datetime64[ns]")
+    days = np.empty(n, dtype=np.int32)
+    days[1:] = np.diff(ts) // np.timedelta64(1, "D")
+    days[bounds[:-1]] = -1
+
+    median_amount = _partition_medians(
+        df["amount"].to_numpy(np.float64), bounds, _partition_chunks(bounds)
+    )
+    return df, days, median_amount, bounds
 
 
 class SalaryDetector:
@@ -12,32 +186,107 @@ class SalaryDetector:
         """Initialize with database connection"""
         self.conn = conn
 
-    def get_credit_transactions(self) -> pd.DataFrame:
+    def get_credit_transactions(self, incremental: bool = False) -> pd.DataFrame:
         """
-        Fetch credit transactions from the database with amount >= 70000.
+        Fetch credit transactions from the database with amount >= 70000,
+        along with each row's `days_since_last` and its merchant's `median_amount`.
+        Timestamps are parsed to datetime, amounts read as float64 and string
+        columns stored as Arrow-backed `string[pyarrow]`.
+        Rows are exported with COPY and parsed by pandas directly, so the result
+        set is never materialized as Python tuples.
+        If `incremental`, only customers with a credit transaction newer than
+        their entry in customer_salary_cursor are fetched (with full history).
         Returns a pandas DataFrame.
         """
+        customer_filter = ""
+        if incremental:
+            customer_filter = """
+                AND customer_id IN (
+                    SELECT t.customer_id
+                    FROM mv_transactions t
+                    LEFT JOIN customer_salary_cursor s
+                        ON s.customer_id = t.customer_id
+                    WHERE t.ob_transaction_type = 'CREDIT'
+                    AND t.amount >= 70000
+                    GROUP BY t.customer_id, s.last_transaction_timestamp
+                    HAVING s.last_transaction_timestamp IS NULL
+                    OR MAX(t.ob_transaction_timestamp) > s.last_transaction_timestamp
+                )"""
+
+        # Day intervals and per-merchant medians are computed server-side, over the
+        # same (customer_id, merchant_name) partitions that detect_monthly_salary uses.
+        # PERCENTILE_CONT cannot be used as a window function, hence the medians CTE.
         query = """
-            SELECT ob_transaction_id,
-                customer_id,
-                merchant_name,
-                amount,
-                ob_transaction_type,
-                ob_transaction_description,
-                ob_transaction_timestamp
-            FROM mv_transactions
-            WHERE ob_transaction_type = 'CREDIT'
-            AND amount >= 70000
-        """
+            WITH credits AS (
+                SELECT ob_transaction_id,
+                    customer_id,
+                    merchant_name,
+                    amount,
+                    ob_transaction_type,
+                    ob_transaction_description,
+                    ob_transaction_timestamp
+                FROM mv_transactions
+                WHERE ob_transaction_type = 'CREDIT'
+                AND amount >= 70000{customer_filter}
+            ),
+            medians AS (
+                SELECT customer_id,
+                    merchant_name,
+                    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY amount) AS median_amount
+                FROM credits
+                GROUP BY customer_id, merchant_name
+            )
+            SELECT c.ob_transaction_id,
+                c.customer_id,
+                c.merchant_name,
+                c.amount,
+                c.ob_transaction_type,
+                c.ob_transaction_description,
+                c.ob_transaction_timestamp,
+                EXTRACT(
+                    DAY FROM c.ob_transaction_timestamp
+                    - LAG(c.ob_transaction_timestamp) OVER w
+                )::INTEGER AS days_since_last,
+                m.median_amount
+            FROM credits c
+            JOIN medians m
+                ON m.customer_id = c.customer_id
+                AND m.merchant_name IS NOT DISTINCT FROM c.merchant_name
+            WINDOW w AS (
+                PARTITION BY c.customer_id, c.merchant_name
+                ORDER BY c.ob_transaction_timestamp
+            )
+            ORDER BY c.customer_id, c.merchant_name, c.ob_transaction_timestamp
+        """.format(customer_filter=customer_filter)
 
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(query)
-                rows = cur.fetchall()
-                # Extract column names from cursor.description
-                colnames = [desc[0] for desc in cur.description]
-
-            return pd.DataFrame(rows, columns=colnames)
+            # COPY streams the result as CSV into a temporary file, which read_csv
+            # parses straight into column arrays, skipping per-row Python tuples.
+            copy_query = (
+                f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '\\N')"
+            )
+            with tempfile.TemporaryFile() as buf:
+                with self.conn.cursor() as cur:
+                    if incremental:
+                        self._create_salary_cursor_table(cur)
+                    cur.copy_expert(copy_query, buf)
+                buf.seek(0)
+                return pd.read_csv(
+                    buf,
+                    # Parse/cast once here rather than on every per-customer call.
+                    # Strings are Arrow-backed (contiguous UTF-8 buffers rather than
+                    # one Python object per cell); numbers stay numpy for the kernels.
+                    dtype={
+                        "ob_transaction_id": "string[pyarrow]",
+                        "merchant_name": "string[pyarrow]",
+                        "amount": np.float64,
+                        "ob_transaction_type": "string[pyarrow]",
+                        "ob_transaction_description": "string[pyarrow]",
+                    },
+                    parse_dates=["ob_transaction_timestamp"],
+                    na_values=["\\N"],
+                    keep_default_na=False,
+                )
 
         except Exception as e:
             print(f"An error occurred: {e}")
@@ -55,132 +304,87 @@ class SalaryDetector:
     ) -> pd.DataFrame:
         """
         Detect potential monthly salary transactions for a single customer.
+        See `detect_salary_transactions` for the detection steps.
+        """
+        return self.detect_salary_transactions(
+            df[df["customer_id"] == customer_id],
+            min_amount=min_amount,
+            day_interval_range=day_interval_range,
+            amount_tolerance=amount_tolerance,
+            min_occurrences=min_occurrences,
+        )
+
+    def detect_salary_transactions(
+        self,
+        df: pd.DataFrame,
+        min_amount: float = 70000.0,
+        day_interval_range: Tuple[int, int] = (25, 35),
+        amount_tolerance: float = 0.1,
+        min_occurrences: int = 3,
+    ) -> pd.DataFrame:
+        """
+        Detect potential monthly salary transactions for every customer in `df`
+        in a single pass.
 
         Steps:
         1. Filter transactions (CREDIT, minimum amount, etc.).
-        2. Group by merchant (same merchant implies same potential employer).
-        3. Within each merchant, sort by date and:
+        2. Partition by customer and merchant (same merchant implies same potential
+           employer), sorted by date.
+        3. Within each partition:
         - Compute day intervals between consecutive transactions.
         - Check if intervals ~ monthly (28–35 days).
         - Check if amounts are similar (within `amount_tolerance` of median or each other).
         4. Return all transactions that fit a recurring pattern (>= `min_occurrences`).
+
+        `df` is expected as returned by `get_credit_transactions`: timestamps already
+        parsed to datetime and amounts as floats. If `df` also carries
+        `days_since_last` and `median_amount`, they are used instead of being
+        recomputed, but only when the filter below keeps every row of `df`.
         """
 
         # --- 1) Filter to relevant transactions ---
-        customer_df = df[
-            (df["customer_id"] == customer_id)
-            & (df["ob_transaction_type"] == "CREDIT")
-            & (df["amount"] >= min_amount)
-        ].copy()
+        candidate_df = df[
+            (df["ob_transaction_type"] == "CREDIT") & (df["amount"] >= min_amount)
+        ]
 
-        if customer_df.empty:
+        if candidate_df.empty:
             return pd.DataFrame()
 
-        # Convert timestamps to datetime
-        if not pd.api.types.is_datetime64_any_dtype(
-            customer_df["ob_transaction_timestamp"]
-        ):
-            customer_df["ob_transaction_timestamp"] = pd.to_datetime(
-                customer_df["ob_transaction_timestamp"]
-            )
-
-        # Sort globally (this also helps the grouping step)
-        customer_df.sort_values("ob_transaction_timestamp", inplace=True)
-
-        # --- 2) Group by merchant ---
-        results = []
-
-        grouped = customer_df.groupby("merchant_name", dropna=False)
-
-        for merchant, grp in grouped:
-            # Sort by date within this merchant group
-            grp = grp.sort_values("ob_transaction_timestamp").copy()
-            if len(grp) < min_occurrences:
-                continue
-
-            # --- 3) Compute day intervals between consecutive transactions ---
-            grp["days_since_last"] = grp["ob_transaction_timestamp"].diff().dt.days
-
-            # A quick approach: we check if a large majority of intervals are within 28–35 days
-            valid_intervals = (grp["days_since_last"] >= day_interval_range[0]) & (
-                grp["days_since_last"] <= day_interval_range[1]
+        # Precomputed intervals/medians describe the unfiltered partitions; once the
+        # filter drops a row they point at rows that are gone, so recompute them.
+        if len(candidate_df) < len(df):
+            candidate_df = candidate_df.drop(
+                columns=["days_since_last", "median_amount"], errors="ignore"
             )
 
-            # If at least (min_occurrences - 1) intervals are valid, there's a good chance of monthly pattern.
-            # Because for N transactions, there are N-1 intervals.
-            if valid_intervals.sum() < (min_occurrences - 1):
-                continue
-
-            # --- 4) Check if amounts are similar ---
-            median_amount = grp["amount"].median()
-
-            # Tolerance check: amount must be within e.g. 10% if amount_tolerance=0.1
-            lower_bound = median_amount * (1 - amount_tolerance)
-            upper_bound = median_amount * (1 + amount_tolerance)
-
-            grp["amount_in_range"] = grp["amount"].between(lower_bound, upper_bound)
-
-            # We'll consider this a valid merchant if at least min_occurrences transactions
-            # are within the range and the monthly interval condition.
-            # We'll combine both conditions: day interval pattern + amount similarity.
-            # For day interval pattern, we need consecutive intervals in range. Let's
-            # build a small rolling approach to see if we can get a run of `min_occurrences` valid intervals.
-
-            # We'll look at sequences:
-            #   - We want at least min_occurrences transactions in a row that have 'days_since_last' in valid range
-            #   - And amounts are in tolerance range
-            # More simply, let's do a pass over the transactions to find consecutive monthly intervals.
-
-            candidate_indices = grp.index.tolist()
-            valid_streak_indices = []
-
-            # Start from the first row (except it doesn't have a days_since_last), then move forward
-            # We want a sliding window to see if each consecutive pair is valid. We'll track runs.
-            streak = [candidate_indices[0]]
-            for i in range(1, len(grp)):
-                current_idx = candidate_indices[i]
-                prev_idx = candidate_indices[i - 1]
-
-                # Check if current transaction days_since_last is in monthly range:
-                in_interval = grp.loc[current_idx, "days_since_last"]
-                if (
-                    in_interval >= day_interval_range[0]
-                    and in_interval <= day_interval_range[1]
-                ):
-                    # Now also check if both this and the previous transaction's amounts are in range
-                    if (
-                        grp.loc[current_idx, "amount_in_range"]
-                        and grp.loc[prev_idx, "amount_in_range"]
-                    ):
-                        streak.append(current_idx)
-                    else:
-                        # Streak breaks
-                        if len(streak) >= min_occurrences:
-                            valid_streak_indices.extend(streak)
-                        streak = [current_idx]
-                else:
-                    # Streak breaks
-                    if len(streak) >= min_occurrences:
-                        valid_streak_indices.extend(streak)
-                    streak = [current_idx]
-
-            # End of loop, check the final streak
-            if len(streak) >= min_occurrences:
-                valid_streak_indices.extend(streak)
-
-            valid_streak_indices = list(set(valid_streak_indices))  # unique
-            if not valid_streak_indices:
-                continue
-
-            # We'll add the valid transactions to our result set:
-            final_grp = grp.loc[valid_streak_indices].copy()
-            results.append(final_grp)
-
-        if not results:
+        # --- 2) & 3) Day intervals and medians per (customer, merchant) ---
+        candidate_df, days, median_amount, bounds = _partition_features(candidate_df)
+
+        # --- 4) Check if amounts are similar ---
+        # Tolerance check: amount must be within e.g. 10% if amount_tolerance=0.1
+        amount = candidate_df["amount"].to_numpy(np.float64)
+        lower_bound = median_amount * (1 - amount_tolerance)
+        upper_bound = median_amount * (1 + amount_tolerance)
+        in_range = (amount >= lower_bound) & (amount <= upper_bound)
+
+        # We want at least min_occurrences transactions in a row from the same merchant
+        # that have 'days_since_last' in valid range and amounts in tolerance range.
+        # The -1 interval at each partition boundary breaks the streak, so one compiled
+        # scan over the whole frame covers every customer and merchant, with chunks
+        # of whole partitions spread across threads.
+        lo, hi = day_interval_range
+        keep = _scan_streaks(
+            days, in_range, bounds, _partition_chunks(bounds), lo, hi, min_occurrences
+        )
+        if not keep.any():
             return pd.DataFrame()
 
-        # Combine all merchant results
-        result_df = pd.concat(results).sort_values("ob_transaction_timestamp")
+        # Order the kept rows by timestamp with one stable argsort on the raw
+        # datetime64 values, then gather them in a single take.
+        positions = np.flatnonzero(keep)
+        ts = candidate_df["ob_transaction_timestamp"].to_numpy("datetime64[ns]")
+        order = np.argsort(ts[positions], kind="stable")
+        result_df = candidate_df.take(positions[order])
 
         # drop duplicates if a transaction meets multiple patterns
         result_df.drop_duplicates(
@@ -188,27 +392,20 @@ class SalaryDetector:
         )
 
         # Pick the columns
-        columns_to_return = [
-            "customer_id",
-            "ob_transaction_id",
-            "merchant_name",
-            "amount",
-            "ob_transaction_description",
-            "ob_transaction_timestamp",
-        ]
-        for col in columns_to_return:
+        for col in _SALARY_COLUMNS:
             if col not in result_df.columns:
                 result_df[col] = None
 
-        return result_df[columns_to_return]
+        return result_df[_SALARY_COLUMNS]
 
-    def save_salary_transactions(self, df: pd.DataFrame) -> None:
+    def save_salary_transactions(self, df: pd.DataFrame) -> bool:
         """
         Save detected salary transactions to customer_salary table.
         Creates table if it doesn't exist.
+        Returns False if saving failed.
         """
         if df.empty:
-            return
+            return True
 
         create_table_query = """
         CREATE TABLE IF NOT EXISTS customer_salary (
@@ -230,14 +427,7 @@ class SalaryDetector:
             amount,
             ob_transaction_description,
             ob_transaction_timestamp
-        ) VALUES (
-            %(customer_id)s,
-            %(ob_transaction_id)s,
-            %(merchant_name)s,
-            %(amount)s,
-            %(ob_transaction_description)s,
-            %(ob_transaction_timestamp)s
-        )
+        ) VALUES %s
         ON CONFLICT (ob_transaction_id)
         DO UPDATE SET
             merchant_name = EXCLUDED.merchant_name,
@@ -249,31 +439,96 @@ class SalaryDetector:
         try:
             with self.conn.cursor() as cur:
                 cur.execute(create_table_query)
-                records = df.to_dict("records")
-                execute_batch(cur, upsert_query, records)
+                # A multi-row upsert can't touch the same key twice; keep the last row
+                # per transaction, as the row-by-row upsert effectively did.
+                df = df.drop_duplicates(subset=["ob_transaction_id"], keep="last")
+                # Missing values must reach psycopg2 as None, not NaN
+                df = df.astype(object).where(df.notna(), None)
+                # Plain tuples in the INSERT's column order, no per-row dicts
+                records = list(df[_SALARY_COLUMNS].itertuples(index=False, name=None))
+                execute_values(cur, upsert_query, records, page_size=1000)
         except Exception as e:
             print(f"Error saving salary transactions: {e}")
+            return False
+        return True
+
+    def _create_salary_cursor_table(self, cur) -> None:
+        """Create the customer_salary_cursor table if it doesn't exist."""
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS customer_salary_cursor (
+                customer_id INTEGER PRIMARY KEY,
+                last_transaction_timestamp TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
 
-    def process_customer_salary(self) -> None:
+    def save_salary_cursor(self, credit_df: pd.DataFrame) -> None:
         """
-        Process complete salary detection pipeline for a customer.
+        Record, per processed customer, the latest credit transaction seen, so
+        incremental runs can skip customers with nothing new.
+        Creates table if it doesn't exist.
+        """
+        if credit_df.empty:
+            return
+
+        upsert_query = """
+        INSERT INTO customer_salary_cursor (
+            customer_id,
+            last_transaction_timestamp
+        ) VALUES %s
+        ON CONFLICT (customer_id)
+        DO UPDATE SET
+            last_transaction_timestamp = EXCLUDED.last_transaction_timestamp,
+            updated_at = CURRENT_TIMESTAMP
+        """
+
+        last_seen = credit_df.groupby("customer_id")["ob_transaction_timestamp"].max()
+
+        try:
+            with self.conn.cursor() as cur:
+                self._create_salary_cursor_table(cur)
+                records = list(zip(last_seen.index.tolist(), last_seen.tolist()))
+                execute_values(cur, upsert_query, records, page_size=1000)
+        except Exception as e:
+            print(f"Error saving salary cursor: {e}")
+
+    def process_customer_salary(
+        self, min_occurrences: int = 3, incremental: bool = False
+    ) -> None:
+        """
+        Process complete salary detection pipeline for all customers.
         Detects and saves salary transactions.
+
+        With `incremental`, only customers with credit transactions newer than
+        the previous run are reprocessed; the others' salary rows are already
+        saved. Only use it with the same detection parameters as previous runs.
         """
-        credit_df = self.get_credit_transactions()
-        customer_ids = credit_df["customer_id"].unique()
-        all_salary_transactions = []
-
-        # Process each customer and append salary transactions to the list
-        for customer_id in customer_ids:
-            salary_transactions = self.detect_monthly_salary(credit_df, customer_id)
-            if not salary_transactions.empty:
-                all_salary_transactions.extend(salary_transactions.to_dict("records"))
-                print(
-                    f"Salary transactions for customer {customer_id} appended to list"
-                )
-            else:
-                print(f"No salary transactions detected for customer {customer_id}")
+        credit_df = self.get_credit_transactions(incremental=incremental)
+
+        # Customers with fewer than min_occurrences candidate rows can't have a streak,
+        # which is the common case; drop them before detection.
+        counts = credit_df["customer_id"].value_counts()
+        eligible = credit_df["customer_id"].map(counts) >= min_occurrences
+        n_skipped = int((counts < min_occurrences).sum())
+        if n_skipped:
+            print(
+                f"Skipped {n_skipped} customers with fewer than "
+                f"{min_occurrences} credit transactions"
+            )
+
+        # All remaining customers are detected in one pass over the frame
+        salary_df = self.detect_salary_transactions(
+            credit_df[eligible], min_occurrences=min_occurrences
+        )
+        n_detected = salary_df["customer_id"].nunique() if not salary_df.empty else 0
+        print(
+            f"Salary transactions detected for {n_detected} of "
+            f"{len(counts)} customers"
+        )
 
-        # Create a DataFrame from the list of all salary transactions
-        all_salary_transactions_df = pd.DataFrame(all_salary_transactions)
-        self.save_salary_transactions(all_salary_transactions_df)
+        # Only move the cursor once the salaries are saved, or incremental runs
+        # would skip these customers for good
+        if self.save_salary_transactions(salary_df):
+            self.save_salary_cursor(credit_df)